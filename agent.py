@@ -1,63 +1,365 @@
 """VRC Training Insights Agent - Strands agent with Strava integration"""
 
 import os
-import json
+import asyncio
+import atexit
+import contextlib
+import functools
 import re
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Annotated, AsyncIterator, Dict, List, Optional, Any, Tuple
 import boto3
-from strands import Agent, tool
+import orjson
+from botocore.config import Config
+from botocore.exceptions import ClientError
+import httpx
+import msgspec
+from cachetools import TTLCache
+from strands import Agent, ToolContext, tool
+from strands.models import BedrockModel, CacheConfig
+from strands.tools.executors import ConcurrentToolExecutor
 from strands.hooks import AgentInitializedEvent, HookProvider, HookRegistry, MessageAddedEvent
 from bedrock_agentcore.memory.constants import ConversationalMessage, MessageRole
 from bedrock_agentcore.memory.session import MemorySessionManager
 from bedrock_agentcore.runtime import BedrockAgentCoreApp, BedrockAgentCoreContext
 
-# Initialize AWS clients
-dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+def _dump(obj: Any) -> str:
+    """Serialize tool output to compact JSON (orjson is much faster than stdlib json)"""
+    return orjson.dumps(obj).decode()
+
+
+AWS_REGION = 'us-east-1'
+
+# Connection pooling, keepalive and adaptive retries for every AWS client in the process
+_AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 3}
+)
+
+
+# AWS clients are created lazily on first use to keep botocore model loading off cold-start import
+@functools.lru_cache(maxsize=1)
+def _boto_session() -> boto3.Session:
+    """Process-wide boto3 session, so all clients share resolved credentials and loaded service data"""
+    return boto3.Session(region_name=AWS_REGION)
+
+
+# Clients are thread-safe once built, but creating them from one Session is not
+_BOTO_CLIENT_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _dynamo():
+    """Shared DynamoDB client for the process"""
+    with _BOTO_CLIENT_LOCK:
+        return _boto_session().client('dynamodb', config=_AWS_CLIENT_CONFIG)
 
 # Strava API configuration
 STRAVA_API_BASE = 'https://www.strava.com/api/v3'
 
-class StravaTools:
-    """Tools for fetching Strava data using stored user tokens"""
+# Unit conversion (multiply by the inverse rather than dividing per row)
+METERS_PER_MILE = 1609.34
+_INV_METERS_PER_MILE = 1 / METERS_PER_MILE
+
+# Shared async HTTP client so Strava calls reuse keep-alive (HTTP/2 where available)
+# connections and overlap on the event loop instead of tying up threads. The
+# AgentCore runtime runs every invocation on one worker loop, which owns this client.
+_HTTP = httpx.AsyncClient(
+    # Large activity pages and token refreshes can take several seconds; httpx's 5s
+    # default would fail them, so allow 30s per read/write and 5s to connect
+    timeout=httpx.Timeout(30.0, connect=5.0),
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
+)
+
+# Latest Strava rate-limit state from the X-RateLimit-* (overall) and X-ReadRateLimit-*
+# (read-only requests, a lower quota) headers, stored as (usage, limit, window id) for the
+# 15-minute and UTC-day windows. An entry only applies while its window is current.
+_RATE_STATE: Dict[str, Tuple[int, int, int]] = {
+    'short': (0, 0, 0), 'daily': (0, 0, 0), 'read_short': (0, 0, 0), 'read_daily': (0, 0, 0)
+}
+STRAVA_RATE_WINDOW_SECONDS = 900
+STRAVA_DAY_SECONDS = 86400
+RATE_LIMIT_PACING_THRESHOLD = 0.9
+MAX_RATE_LIMIT_WAIT_SECONDS = 30
+
+
+# Requests sent but not yet answered, counted on top of the last recorded usage, and the
+# earliest time.monotonic() the next paced request may go out. Both are reserved before
+# each send, so a gathered fan-out can't all pass pacing on a stale reading.
+_RATE_PENDING = 0
+_RATE_NEXT_SEND = 0.0
+
+
+class StravaRateLimitError(Exception):
+    """Raised when Strava's rate limit would force an unreasonably long wait"""
+
+
+# Conditional GET cache: (path, token, params) -> (etag, response)
+_HTTP_CACHE: Dict[Tuple, Tuple[str, httpx.Response]] = {}
+HTTP_CACHE_MAX_ENTRIES = 256
+
+
+def _seconds_until_rate_window_reset() -> int:
+    """Strava's 15-minute windows reset on the quarter hour"""
+    return STRAVA_RATE_WINDOW_SECONDS - int(time.time()) % STRAVA_RATE_WINDOW_SECONDS
+
+
+def _rate_window_id(window: str, now: int) -> int:
+    """Index of the 15-minute or UTC-day window containing now (both reset on epoch boundaries)"""
+    period = STRAVA_RATE_WINDOW_SECONDS if window.endswith('short') else STRAVA_DAY_SECONDS
+    return now // period
+
+
+def _record_rate_limit(response: httpx.Response) -> None:
+    """Store the rate-limit usage reported on a Strava response"""
+    now = int(time.time())
+    for prefix, header in (('', 'X-RateLimit'), ('read_', 'X-ReadRateLimit')):
+        usage = response.headers.get(f'{header}-Usage')
+        limit = response.headers.get(f'{header}-Limit')
+        if not usage or not limit:
+            continue
 
-    @staticmethod
-    def get_user_tokens(strava_user_id: str) -> Dict[str, str]:
-        """Fetch user's Strava tokens from DynamoDB"""
         try:
-            response = dynamodb.get_item(
-                TableName='vrc-users',
-                Key={'strava_user_id': {'S': strava_user_id}}
+            short_usage, daily_usage = (int(v) for v in usage.split(','))
+            short_limit, daily_limit = (int(v) for v in limit.split(','))
+        except ValueError:
+            continue
+
+        _RATE_STATE[f'{prefix}short'] = (short_usage, short_limit, _rate_window_id('short', now))
+        _RATE_STATE[f'{prefix}daily'] = (daily_usage, daily_limit, _rate_window_id('daily', now))
+
+
+def _rate_usage(window: str, now: int) -> Tuple[int, int]:
+    """(usage, limit) recorded for a window, or (0, 0) once that window has rolled over"""
+    usage, limit, window_id = _RATE_STATE[window]
+    if window_id != _rate_window_id(window, now):
+        return 0, 0
+    return usage, limit
+
+
+def _rate_limit_spacing() -> float:
+    """Seconds to space the next request by (or fail fast) when near Strava's limits"""
+    now = int(time.time())
+    for window in ('daily', 'read_daily'):
+        daily_usage, daily_limit = _rate_usage(window, now)
+        if daily_limit and daily_usage + _RATE_PENDING >= daily_limit:
+            raise StravaRateLimitError('Strava daily rate limit reached. Please try again tomorrow.')
+
+    remaining_seconds = _seconds_until_rate_window_reset()
+
+    # Pace against whichever 15-minute quota (overall or read) is tighter
+    delay = 0.0
+    short_usage = short_limit = 0
+    for window in ('short', 'read_short'):
+        usage, limit = _rate_usage(window, now)
+        usage += _RATE_PENDING
+        if not limit or usage < limit * RATE_LIMIT_PACING_THRESHOLD:
+            continue
+
+        remaining_calls = limit - usage
+        if remaining_calls > 0:
+            # Spread the remaining quota over the rest of the window
+            window_delay = remaining_seconds / remaining_calls
+        else:
+            window_delay = remaining_seconds
+
+        if window_delay > delay:
+            delay, short_usage, short_limit = window_delay, usage, limit
+
+    if delay > MAX_RATE_LIMIT_WAIT_SECONDS:
+        raise StravaRateLimitError(
+            f'Strava rate limit nearly exhausted ({short_usage}/{short_limit}). '
+            f'Please try again in {remaining_seconds // 60 + 1} minutes.'
+        )
+
+    return delay
+
+
+@contextlib.asynccontextmanager
+async def _rate_limit_slot():
+    """Reserve quota and a send time for one request, counting it in flight until its response is recorded"""
+    global _RATE_PENDING, _RATE_NEXT_SEND
+    # Nothing awaits before the reservation, so concurrent callers on the loop see each other's
+    spacing = _rate_limit_spacing()
+    now = time.monotonic()
+    send_at = max(now, _RATE_NEXT_SEND) + spacing
+    wait = send_at - now
+    if wait > MAX_RATE_LIMIT_WAIT_SECONDS:
+        raise StravaRateLimitError(
+            f'Strava rate limit nearly exhausted. '
+            f'Please try again in {_seconds_until_rate_window_reset() // 60 + 1} minutes.'
+        )
+
+    _RATE_NEXT_SEND = send_at
+    _RATE_PENDING += 1
+    try:
+        if wait > 0:
+            print(f"⏳ Strava rate limit nearly reached, pacing request by {wait:.1f}s")
+            await asyncio.sleep(wait)
+        yield
+    finally:
+        _RATE_PENDING -= 1
+
+
+def _retry_after_seconds(response: httpx.Response) -> int:
+    """Parse Retry-After from a 429, defaulting to the next window reset"""
+    try:
+        return int(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return _seconds_until_rate_window_reset()
+
+
+async def _strava_get(
+    path: str,
+    access_token: str,
+    params: Optional[Dict[str, Any]] = None,
+    conditional: bool = False
+) -> httpx.Response:
+    """GET a Strava API path on the shared client, honoring Strava's rate limits.
+
+    With conditional=True the last response's ETag is sent as If-None-Match and
+    a 304 returns the cached response instead of re-downloading the body.
+
+    Gather several calls to run independent requests concurrently.
+    """
+    cache_key = (path, access_token, tuple(sorted(params.items())) if params else ())
+
+    async def send() -> httpx.Response:
+        headers = {'Authorization': f"Bearer {access_token}"}
+        cached = _HTTP_CACHE.get(cache_key) if conditional else None
+        if cached:
+            headers['If-None-Match'] = cached[0]
+
+        async with _rate_limit_slot():
+            response = await _HTTP.get(
+                f'{STRAVA_API_BASE}{path}',
+                headers=headers,
+                params=params
             )
+            _record_rate_limit(response)
 
-            if 'Item' not in response:
-                raise ValueError(f"User {strava_user_id} not found")
+        if cached and response.status_code == 304:
+            return cached[1]
 
-            item = response['Item']
-            access_token = item['access_token']['S']
-            refresh_token = item['refresh_token']['S']
-            expires_at = int(item['expires_at']['N'])
-
-            # Check if token needs refresh
-            if expires_at < int(datetime.now().timestamp()) + 3600:
-                access_token, refresh_token = StravaTools.refresh_token(
-                    strava_user_id, refresh_token
-                )
+        etag = response.headers.get('ETag')
+        if conditional and response.is_success and etag:
+            _HTTP_CACHE.pop(cache_key, None)
+            _HTTP_CACHE[cache_key] = (etag, response)
+            if len(_HTTP_CACHE) > HTTP_CACHE_MAX_ENTRIES:
+                # Evict the oldest entry (dicts keep insertion order)
+                _HTTP_CACHE.pop(next(iter(_HTTP_CACHE)), None)
+
+        return response
+
+    response = await send()
+
+    if response.status_code == 429:
+        retry_after = _retry_after_seconds(response)
+        if retry_after > MAX_RATE_LIMIT_WAIT_SECONDS:
+            raise StravaRateLimitError(
+                f'Strava rate limit exceeded. Please try again in {retry_after // 60 + 1} minutes.'
+            )
+
+        print(f"⏳ Strava returned 429, retrying after {retry_after}s")
+        await asyncio.sleep(retry_after)
+        response = await send()
 
+    return response
+
+# Background pool for DynamoDB writes that don't need to block a tool call
+_DB_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='dynamodb-write')
+atexit.register(_DB_POOL.shutdown, wait=True)
+
+# Refreshed Strava tokens are written to DynamoDB before the tool call continues. Strava
+# revokes the old refresh token on refresh, so a lost write strands the athlete until they
+# re-authorize; set STRAVA_TOKEN_WRITE_BEHIND=true to move the write to the background.
+TOKEN_WRITE_BEHIND = os.getenv('STRAVA_TOKEN_WRITE_BEHIND', 'false').lower() == 'true'
+TOKEN_WRITE_ATTEMPTS = 5
+
+# In-process token cache: strava_user_id -> (access_token, refresh_token, expires_at)
+_TOKEN_CACHE: Dict[str, Tuple[str, str, int]] = {}
+_TOKEN_CACHE_LOCK = threading.Lock()
+# Per-user locks serializing cache misses (DynamoDB read and token refresh) on the event loop
+_TOKEN_LOAD_LOCKS: Dict[str, asyncio.Lock] = {}
+
+class StravaTools:
+    """Tools for fetching Strava data using stored user tokens"""
+
+    @staticmethod
+    def _cached_tokens(strava_user_id: str, now_ts: int) -> Optional[Dict[str, str]]:
+        """Cached tokens for a user if the access token is good for at least another hour"""
+        with _TOKEN_CACHE_LOCK:
+            cached = _TOKEN_CACHE.get(strava_user_id)
+
+        if cached and cached[2] > now_ts + 3600:
             return {
-                'access_token': access_token,
-                'refresh_token': refresh_token
+                'access_token': cached[0],
+                'refresh_token': cached[1]
             }
-        except Exception as e:
-            raise Exception(f"Error fetching user tokens: {str(e)}")
+        return None
 
     @staticmethod
-    def refresh_token(strava_user_id: str, refresh_token: str) -> tuple[str, str]:
-        """Refresh Strava access token"""
-        import requests
+    async def get_user_tokens(strava_user_id: str) -> Dict[str, str]:
+        """Fetch user's Strava tokens, using the in-process cache when still valid"""
+        now_ts = int(time.time())
+        cached = StravaTools._cached_tokens(strava_user_id, now_ts)
+        if cached:
+            return cached
+
+        # One load/refresh per user at a time: Strava revokes a refresh token once it has
+        # been used, so a second concurrent refresh with the same token would fail
+        async with _TOKEN_LOAD_LOCKS.setdefault(strava_user_id, asyncio.Lock()):
+            cached = StravaTools._cached_tokens(strava_user_id, now_ts)
+            if cached:
+                return cached
 
-        response = requests.post(
+            try:
+                # The DynamoDB client is synchronous, so keep it off the event loop
+                response = await asyncio.to_thread(
+                    lambda: _dynamo().get_item(
+                        TableName='vrc-users',
+                        Key={'strava_user_id': {'S': strava_user_id}}
+                    )
+                )
+
+                if 'Item' not in response:
+                    raise ValueError(f"User {strava_user_id} not found")
+
+                item = response['Item']
+                access_token = item['access_token']['S']
+                refresh_token = item['refresh_token']['S']
+                expires_at = int(item['expires_at']['N'])
+
+                # Check if token needs refresh (refresh_token updates the cache itself)
+                if expires_at < now_ts + 3600:
+                    access_token, refresh_token = await StravaTools.refresh_token(
+                        strava_user_id, refresh_token
+                    )
+                else:
+                    with _TOKEN_CACHE_LOCK:
+                        _TOKEN_CACHE[strava_user_id] = (access_token, refresh_token, expires_at)
+
+                return {
+                    'access_token': access_token,
+                    'refresh_token': refresh_token
+                }
+            except Exception as e:
+                raise Exception(f"Error fetching user tokens: {str(e)}")
+
+    @staticmethod
+    async def refresh_token(strava_user_id: str, refresh_token: str) -> tuple[str, str]:
+        """Refresh Strava access token"""
+        response = await _HTTP.post(
             'https://www.strava.com/api/v3/oauth/token',
             data={
                 'client_id': '181417',
@@ -67,29 +369,75 @@ class StravaTools:
             }
         )
 
-        if not response.ok:
+        if not response.is_success:
             raise Exception(f"Token refresh failed: {response.status_code}")
 
-        token_data = response.json()
+        token_data = orjson.loads(response.content)
         new_access_token = token_data['access_token']
         new_refresh_token = token_data['refresh_token']
         new_expires_at = token_data['expires_at']
 
-        # Update DynamoDB
-        dynamodb.update_item(
-            TableName='vrc-users',
-            Key={'strava_user_id': {'S': strava_user_id}},
-            UpdateExpression='SET access_token = :at, refresh_token = :rt, expires_at = :ea, updated_at = :ua',
-            ExpressionAttributeValues={
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[strava_user_id] = (new_access_token, new_refresh_token, int(new_expires_at))
+
+        update_args = {
+            'TableName': 'vrc-users',
+            'Key': {'strava_user_id': {'S': strava_user_id}},
+            'UpdateExpression': 'SET access_token = :at, refresh_token = :rt, expires_at = :ea, updated_at = :ua',
+            'ExpressionAttributeValues': {
                 ':at': {'S': new_access_token},
                 ':rt': {'S': new_refresh_token},
                 ':ea': {'N': str(new_expires_at)},
                 ':ua': {'S': datetime.now().isoformat()}
             }
-        )
+        }
+
+        # Update DynamoDB (in the background if write-behind is enabled;
+        # the new tokens are already usable from the cache)
+        if TOKEN_WRITE_BEHIND:
+            _DB_POOL.submit(StravaTools._write_tokens, strava_user_id, update_args)
+        else:
+            await asyncio.to_thread(StravaTools._write_tokens, strava_user_id, update_args)
 
         return new_access_token, new_refresh_token
 
+    @staticmethod
+    def _write_tokens(strava_user_id: str, update_args: Dict[str, Any]):
+        """Persist refreshed tokens, retrying with exponential backoff before giving up"""
+        for attempt in range(TOKEN_WRITE_ATTEMPTS):
+            try:
+                _dynamo().update_item(**update_args)
+                return
+            except Exception as e:
+                if attempt < TOKEN_WRITE_ATTEMPTS - 1:
+                    time.sleep(0.2 * (2 ** attempt))
+                    continue
+
+                print(f"❌ Failed to persist refreshed tokens for user {strava_user_id} "
+                      f"after {TOKEN_WRITE_ATTEMPTS} attempts: {e}")
+                raise
+
+def _context_user_id(tool_context: ToolContext) -> str:
+    """Strava user ID of the athlete this agent serves, read from agent state set in invoke()"""
+    strava_user_id = tool_context.agent.state.get('strava_user_id')
+    if not strava_user_id:
+        raise ValueError('Missing strava_user_id in agent state')
+    return strava_user_id
+
+
+# Allowed characters for calculate(): numbers, basic operators, parentheses, whitespace
+_CALC_RE = re.compile(r'^[\d\s+\-*/.()]+$')
+
+# Shared globals for evaluating calculate() expressions without builtins
+_CALC_GLOBALS = {"__builtins__": {}}
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_expression(expression: str):
+    """Compile a sanitized expression once; repeated calculations reuse the code object"""
+    return compile(expression, '<calculate>', 'eval')
+
+
 @tool
 def calculate(expression: str) -> str:
     """
@@ -115,201 +463,422 @@ def calculate(expression: str) -> str:
     """
     try:
         # Sanitize expression - only allow numbers, operators, parentheses, and whitespace
-        if not re.match(r'^[\d\s\+\-\*\/\.\(\)]+$', expression):
-            return json.dumps({
+        if not _CALC_RE.match(expression):
+            return _dump({
                 'error': 'Invalid expression. Only numbers and basic operators (+, -, *, /, parentheses) are allowed.'
             })
 
         # Evaluate the expression safely
-        result = eval(expression, {"__builtins__": {}}, {})
+        result = eval(_compile_expression(expression), _CALC_GLOBALS, {})
+
+        # orjson only encodes 64-bit integers; return larger results as exact digit strings
+        if isinstance(result, int) and not -2**63 <= result < 2**63:
+            result = str(result)
 
-        return json.dumps({
+        return _dump({
             'expression': expression,
             'result': result
         })
     except Exception as e:
-        return json.dumps({
+        return _dump({
             'error': f'Calculation error: {str(e)}',
             'expression': expression
         })
 
-@tool
-def get_recent_activities(strava_user_id: str, per_page: int = 30, days_back: int = 30) -> str:
+# Strava returns at most 200 activities per page; extra pages are fetched concurrently
+STRAVA_MAX_PAGE_SIZE = 200
+MAX_CONCURRENT_PAGES = 6
+
+
+async def _fetch_activities(access_token: str, after: int, count: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Fetch up to `count` activities since `after`, paging with bounded concurrency.
+
+    Strava doesn't report a total, so page 1 is fetched first; only if it comes back
+    full are pages 2..N requested in parallel. Rate-limit pacing and 429 handling
+    happen per request in _strava_get.
+
+    Returns:
+        Tuple of (activities, failing HTTP status code or None)
+    """
+    # count comes from the model; ask for at least one activity
+    count = max(1, count)
+    page_size = min(count, STRAVA_MAX_PAGE_SIZE)
+    page_count = -(-count // page_size)
+
+    async def fetch_page(page: int) -> httpx.Response:
+        return await _strava_get(
+            '/athlete/activities',
+            access_token,
+            params={'per_page': page_size, 'page': page, 'after': after},
+            conditional=True
+        )
+
+    first = await fetch_page(1)
+    if not first.is_success:
+        return [], first.status_code
+
+    activities = orjson.loads(first.content)
+    if page_count == 1 or len(activities) < page_size:
+        return activities, None
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+    async def fetch_page_bounded(page: int) -> httpx.Response:
+        async with semaphore:
+            return await fetch_page(page)
+
+    responses = await asyncio.gather(*(fetch_page_bounded(page) for page in range(2, page_count + 1)))
+
+    for response in responses:
+        if not response.is_success:
+            return [], response.status_code
+
+        page_activities = orjson.loads(response.content)
+        activities.extend(page_activities)
+        if len(page_activities) < page_size:
+            break
+
+    return activities[:count], None
+
+
+@tool(context=True)
+async def get_recent_activities(per_page: int = 30, days_back: int = 30, tool_context: ToolContext = None) -> str:
     """
     Fetch user's recent Strava activities.
 
     Args:
-        strava_user_id: Strava user ID
-        per_page: Number of activities to fetch (default 30)
+        per_page: Number of activities to fetch (default 30; more than 200 are fetched across several pages)
         days_back: Number of days to look back (default 30)
 
     Returns:
         JSON string with activities data
     """
-    import requests
-
-    tokens = StravaTools.get_user_tokens(strava_user_id)
-    after_timestamp = int((datetime.now() - timedelta(days=days_back)).timestamp())
-
-    response = requests.get(
-        f'{STRAVA_API_BASE}/athlete/activities',
-        headers={'Authorization': f"Bearer {tokens['access_token']}"},
-        params={'per_page': per_page, 'after': after_timestamp}
-    )
+    strava_user_id = _context_user_id(tool_context)
+    tokens = await StravaTools.get_user_tokens(strava_user_id)
+    after_timestamp = int(time.time()) - days_back * 86400
+    # Round down to the hour so repeat calls share a cache key for conditional GETs
+    after_timestamp -= after_timestamp % 3600
 
-    if not response.ok:
-        return json.dumps({'error': f"Strava API error: {response.status_code}"})
+    activities, error_status = await _fetch_activities(tokens['access_token'], after_timestamp, per_page)
 
-    activities = response.json()
+    if error_status is not None:
+        return _dump({'error': f"Strava API error: {error_status}"})
 
     # Transform for analysis
     transformed = []
     for activity in activities:
+        distance = activity['distance']
+        moving_time = activity['moving_time']
+        distance_miles = distance * _INV_METERS_PER_MILE
+        get = activity.get
         transformed.append({
             'id': activity['id'],
             'name': activity['name'],
             'type': activity['type'],
-            'sport_type': activity.get('sport_type'),
+            'sport_type': get('sport_type'),
             'start_date': activity['start_date_local'],
-            'distance_meters': activity['distance'],
-            'distance_miles': round(activity['distance'] / 1609.34, 2),
-            'moving_time_seconds': activity['moving_time'],
+            'distance_meters': distance,
+            'distance_miles': round(distance_miles, 2),
+            'moving_time_seconds': moving_time,
             'elapsed_time_seconds': activity['elapsed_time'],
             'total_elevation_gain_meters': activity['total_elevation_gain'],
-            'average_speed_ms': activity.get('average_speed'),
-            'max_speed_ms': activity.get('max_speed'),
-            'average_heartrate': activity.get('average_heartrate'),
-            'max_heartrate': activity.get('max_heartrate'),
-            'average_watts': activity.get('average_watts'),
-            'max_watts': activity.get('max_watts'),
-            'suffer_score': activity.get('suffer_score'),
-            'pace_min_per_mile': round((activity['moving_time'] / 60) / (activity['distance'] / 1609.34), 2) if activity['distance'] > 0 else None
+            'average_speed_ms': get('average_speed'),
+            'max_speed_ms': get('max_speed'),
+            'average_heartrate': get('average_heartrate'),
+            'max_heartrate': get('max_heartrate'),
+            'average_watts': get('average_watts'),
+            'max_watts': get('max_watts'),
+            'suffer_score': get('suffer_score'),
+            'pace_min_per_mile': round((moving_time / 60) / distance_miles, 2) if distance > 0 else None
         })
 
-    return json.dumps({
+    return _dump({
         'count': len(transformed),
         'activities': transformed
-    }, indent=2)
+    })
 
 
-@tool
-def get_athlete_stats(strava_user_id: str) -> str:
+# Short-lived caches for reads the model repeats within a conversation (preview ->
+# confirm -> render card). Keys include the athlete ID; plan writes invalidate.
+READ_CACHE_MAX_ENTRIES = 1024
+READ_CACHE_TTL_SECONDS = 30
+_STATS_CACHE: TTLCache = TTLCache(maxsize=READ_CACHE_MAX_ENTRIES, ttl=READ_CACHE_TTL_SECONDS)
+
+
+@tool(context=True)
+async def get_athlete_stats(tool_context: ToolContext) -> str:
     """
     Fetch athlete's all-time, year-to-date, and recent stats.
 
-    Args:
-        strava_user_id: Strava user ID
-
     Returns:
         JSON string with stats data
     """
-    import requests
+    strava_user_id = _context_user_id(tool_context)
+    cached = _STATS_CACHE.get(strava_user_id)
+    if cached is not None:
+        return cached
 
-    tokens = StravaTools.get_user_tokens(strava_user_id)
+    tokens = await StravaTools.get_user_tokens(strava_user_id)
 
-    response = requests.get(
-        f'{STRAVA_API_BASE}/athletes/{strava_user_id}/stats',
-        headers={'Authorization': f"Bearer {tokens['access_token']}"}
-    )
+    response = await _strava_get(f'/athletes/{strava_user_id}/stats', tokens['access_token'])
 
-    if not response.ok:
-        return json.dumps({'error': f"Strava API error: {response.status_code}"})
+    if not response.is_success:
+        return _dump({'error': f"Strava API error: {response.status_code}"})
 
-    return json.dumps(response.json(), indent=2)
+    # Strava already returns JSON; pass it through rather than decode and re-encode
+    _STATS_CACHE[strava_user_id] = response.text
+    return response.text
 
 
-@tool
-def get_activity_details(strava_user_id: str, activity_id: int) -> str:
+@tool(context=True)
+async def get_activity_details(activity_id: int, tool_context: ToolContext) -> str:
     """
     Fetch detailed information about a specific activity.
 
     Args:
-        strava_user_id: Strava user ID
         activity_id: Activity ID
 
     Returns:
         JSON string with activity details
     """
-    import requests
+    strava_user_id = _context_user_id(tool_context)
+    tokens = await StravaTools.get_user_tokens(strava_user_id)
+
+    response = await _strava_get(f'/activities/{activity_id}', tokens['access_token'])
+
+    if not response.is_success:
+        return _dump({'error': f"Strava API error: {response.status_code}"})
+
+    # Strava already returns JSON; pass it through rather than decode and re-encode
+    return response.text
+
+
+# Cap on IDs per bulk lookup to avoid bursting through Strava's rate limit
+MAX_BULK_ACTIVITY_IDS = 20
 
-    tokens = StravaTools.get_user_tokens(strava_user_id)
 
-    response = requests.get(
-        f'{STRAVA_API_BASE}/activities/{activity_id}',
-        headers={'Authorization': f"Bearer {tokens['access_token']}"}
+@tool(context=True)
+async def get_activities_details_bulk(activity_ids: List[int], tool_context: ToolContext) -> str:
+    """
+    Fetch detailed information about several activities at once.
+
+    Prefer this over calling get_activity_details repeatedly - the requests run in parallel.
+
+    Args:
+        activity_ids: List of activity IDs (max 20)
+
+    Returns:
+        JSON string with a list of activity details, in the same order as activity_ids
+    """
+    strava_user_id = _context_user_id(tool_context)
+    if not activity_ids:
+        return _dump({'error': 'No activity IDs provided'})
+
+    if len(activity_ids) > MAX_BULK_ACTIVITY_IDS:
+        return _dump({'error': f'Too many activity IDs ({len(activity_ids)}). Maximum is {MAX_BULK_ACTIVITY_IDS} per call.'})
+
+    tokens = await StravaTools.get_user_tokens(strava_user_id)
+
+    responses = await asyncio.gather(
+        *(_strava_get(f'/activities/{activity_id}', tokens['access_token']) for activity_id in activity_ids),
+        return_exceptions=True
     )
 
-    if not response.ok:
-        return json.dumps({'error': f"Strava API error: {response.status_code}"})
+    details = []
+    for activity_id, response in zip(activity_ids, responses):
+        if isinstance(response, Exception):
+            details.append({'id': activity_id, 'error': f"Request failed: {str(response)}"})
+        elif response.is_success:
+            details.append(orjson.loads(response.content))
+        else:
+            details.append({'id': activity_id, 'error': f"Strava API error: {response.status_code}"})
 
-    return json.dumps(response.json(), indent=2)
+    return _dump(details)
 
 
-@tool
-def get_club_members_recent_activities(strava_user_id: str, club_id: int = None, days_back: int = 7) -> str:
+@tool(context=True)
+async def get_club_members_recent_activities(club_id: int = None, days_back: int = 7, tool_context: ToolContext = None) -> str:
     """
     Fetch recent activities from club members for comparison.
 
     Args:
-        strava_user_id: Strava user ID
         club_id: Strava club ID (optional, will fetch user's clubs if not provided)
         days_back: Number of days to look back (default 7)
 
     Returns:
         JSON string with club activities
     """
-    import requests
-
-    tokens = StravaTools.get_user_tokens(strava_user_id)
+    strava_user_id = _context_user_id(tool_context)
+    tokens = await StravaTools.get_user_tokens(strava_user_id)
 
-    # If no club_id provided, get user's first club
+    # If no club_id provided, get user's first club (the activities request
+    # depends on it, so this lookup stays sequential)
     if club_id is None:
-        clubs_response = requests.get(
-            f'{STRAVA_API_BASE}/athlete/clubs',
-            headers={'Authorization': f"Bearer {tokens['access_token']}"}
-        )
+        clubs_response = await _strava_get('/athlete/clubs', tokens['access_token'])
 
-        if not clubs_response.ok or not clubs_response.json():
-            return json.dumps({'error': 'No clubs found'})
+        clubs = orjson.loads(clubs_response.content) if clubs_response.is_success else None
+        if not clubs:
+            return _dump({'error': 'No clubs found'})
 
-        club_id = clubs_response.json()[0]['id']
+        club_id = clubs[0]['id']
 
     # Get club activities
-    response = requests.get(
-        f'{STRAVA_API_BASE}/clubs/{club_id}/activities',
-        headers={'Authorization': f"Bearer {tokens['access_token']}"},
-        params={'per_page': 50}
-    )
+    response = await _strava_get(f'/clubs/{club_id}/activities', tokens['access_token'], params={'per_page': 50})
 
-    if not response.ok:
-        return json.dumps({'error': f"Strava API error: {response.status_code}"})
+    if not response.is_success:
+        return _dump({'error': f"Strava API error: {response.status_code}"})
 
-    activities = response.json()
-    cutoff_date = datetime.now() - timedelta(days=days_back)
+    activities = orjson.loads(response.content)
+    # start_date_local is ISO-8601, so a plain string compare orders it correctly
+    cutoff_iso = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%dT%H:%M:%S')
 
     # Filter by date and transform
     recent_activities = []
     for activity in activities:
-        activity_date = datetime.fromisoformat(activity['start_date_local'].replace('Z', '+00:00'))
-        if activity_date >= cutoff_date:
+        if activity['start_date_local'] >= cutoff_iso:
             recent_activities.append({
                 'athlete_name': f"{activity['athlete']['firstname']} {activity['athlete']['lastname']}",
                 'name': activity['name'],
                 'type': activity['type'],
-                'distance_miles': round(activity['distance'] / 1609.34, 2),
+                'distance_miles': round(activity['distance'] * _INV_METERS_PER_MILE, 2),
                 'moving_time_seconds': activity['moving_time'],
                 'start_date': activity['start_date_local']
             })
 
-    return json.dumps({
+    return _dump({
         'club_id': club_id,
         'count': len(recent_activities),
         'activities': recent_activities
-    }, indent=2)
+    })
+
+
+def _to_attr(value: Any) -> Dict[str, Any]:
+    """Convert a JSON value into a DynamoDB attribute value"""
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float)):
+        return {'N': str(value)}
+    if isinstance(value, list):
+        return {'L': [_to_attr(v) for v in value]}
+    if isinstance(value, dict):
+        return {'M': {str(k): _to_attr(v) for k, v in value.items()}}
+    return {'S': str(value)}
+
+
+def _from_attr(attr: Dict[str, Any]) -> Any:
+    """Convert a DynamoDB attribute value back into a JSON value"""
+    kind, value = next(iter(attr.items()))
+    if kind == 'N':
+        return int(value) if value.lstrip('-').isdigit() else float(value)
+    if kind == 'NULL':
+        return None
+    if kind == 'L':
+        return [_from_attr(v) for v in value]
+    if kind == 'M':
+        return {k: _from_attr(v) for k, v in value.items()}
+    return value
+
+
+def _plan_data_attr(goal: str, workouts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a week's plan_data attribute with workouts stored as native maps grouped by day.
+
+    Keying workouts by day lets update_workout_in_plan patch a single workout
+    with one UpdateItem instead of reading and rewriting the whole week.
+    """
+    workouts_by_day: Dict[str, List[Dict[str, Any]]] = {}
+    for workout in workouts:
+        workouts_by_day.setdefault(str(workout.get('day') or 'Unscheduled'), []).append(workout)
+
+    return _to_attr({
+        'goal': goal,
+        'day_order': list(workouts_by_day),
+        'workouts_by_day': workouts_by_day
+    })
+
+
+def _plan_data_from_attr(attr: Dict[str, Any]) -> Dict[str, Any]:
+    """Read plan_data in either the native map layout or the legacy JSON-string layout"""
+    if 'S' in attr:
+        return orjson.loads(attr['S'])
+
+    plan = _from_attr(attr)
+    workouts_by_day = plan.get('workouts_by_day', {})
+    return {
+        'goal': plan.get('goal'),
+        'workouts': [
+            workout
+            for day in plan.get('day_order', [])
+            for workout in workouts_by_day.get(day, [])
+        ]
+    }
 
 
-@tool
-def save_training_plan(strava_user_id: str, plan_json: str) -> str:
+# Per-athlete locks for plan writes. Read-only tools run concurrently, but
+# save_training_plan/update_workout_in_plan on the same plan must not interleave.
+_PLAN_WRITE_LOCKS: Dict[str, threading.Lock] = {}
+_PLAN_WRITE_LOCKS_GUARD = threading.Lock()
+
+
+def _plan_write_lock(strava_user_id: str) -> threading.Lock:
+    """Lock serializing training plan writes for one athlete"""
+    with _PLAN_WRITE_LOCKS_GUARD:
+        return _PLAN_WRITE_LOCKS.setdefault(strava_user_id, threading.Lock())
+
+
+# (strava_user_id, requested week_start_date) -> _read_training_plan result
+_PLAN_CACHE: TTLCache = TTLCache(maxsize=READ_CACHE_MAX_ENTRIES, ttl=READ_CACHE_TTL_SECONDS)
+_PLAN_CACHE_LOCK = threading.Lock()
+# Per-athlete count of plan writes; a read only caches its result if no write finished
+# while it was querying, so an in-flight read can't put pre-write data back
+_PLAN_CACHE_GENERATION: Dict[str, int] = {}
+
+
+def _invalidate_plan_cache(strava_user_id: str) -> None:
+    """Drop every cached plan week for an athlete after a plan write"""
+    with _PLAN_CACHE_LOCK:
+        _PLAN_CACHE_GENERATION[strava_user_id] = _PLAN_CACHE_GENERATION.get(strava_user_id, 0) + 1
+        for key in [key for key in _PLAN_CACHE if key[0] == strava_user_id]:
+            _PLAN_CACHE.pop(key, None)
+
+
+# DynamoDB BatchWriteItem accepts at most 25 items per request
+DYNAMODB_BATCH_SIZE = 25
+BATCH_WRITE_MAX_ATTEMPTS = 5
+
+
+def _batch_put_items(table_name: str, items: List[Dict[str, Any]]) -> int:
+    """Write items with BatchWriteItem, retrying unprocessed items with exponential backoff.
+
+    Returns:
+        Number of items confirmed written
+    """
+    written = 0
+
+    for start in range(0, len(items), DYNAMODB_BATCH_SIZE):
+        pending = [{'PutRequest': {'Item': item}} for item in items[start:start + DYNAMODB_BATCH_SIZE]]
+
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            if attempt > 0:
+                time.sleep(0.05 * (2 ** attempt))
+
+            response = _dynamo().batch_write_item(RequestItems={table_name: pending})
+            unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+            written += len(pending) - len(unprocessed)
+            pending = unprocessed
+
+            if not pending:
+                break
+
+        if pending:
+            print(f"⚠️ {len(pending)} items left unprocessed in {table_name} after {BATCH_WRITE_MAX_ATTEMPTS} attempts")
+
+    return written
+
+
+@tool(context=True)
+def save_training_plan(plan_json: str, tool_context: ToolContext) -> str:
     """
     Save a training plan to storage.
 
@@ -318,7 +887,6 @@ def save_training_plan(strava_user_id: str, plan_json: str) -> str:
     ⚠️ CRITICAL: week_start MUST be a Monday (calculate the Monday of each week)!
 
     Args:
-        strava_user_id: Strava user ID
         plan_json: JSON string with structure:
         {
             "goal": "Sub-3 Marathon - April 20, 2025",
@@ -349,120 +917,126 @@ def save_training_plan(strava_user_id: str, plan_json: str) -> str:
     Returns:
         Confirmation message with number of weeks saved
     """
-    try:
-        plan_data = json.loads(plan_json)
-
-        if 'weeks' not in plan_data or not plan_data['weeks']:
-            return json.dumps({'error': 'Invalid plan format - missing weeks array'})
-
-        goal = plan_data.get('goal', 'Training Plan')
-        created_at = plan_data.get('created_at', datetime.now().strftime('%Y-%m-%d'))
-
-        # Generate unique plan ID for this training plan
-        plan_id = str(uuid.uuid4())
-        print(f"📝 Creating new training plan with ID: {plan_id}")
-
-        # Archive old plans: set is_active=False for all existing plans for this user
+    strava_user_id = _context_user_id(tool_context)
+    # Serialize plan writes per athlete so concurrent tool calls can't overwrite each other
+    with _plan_write_lock(strava_user_id):
         try:
-            # Query all existing plans for this user
-            existing_plans = dynamodb.query(
-                TableName='vrc-training-plans',
-                KeyConditionExpression='user_id = :uid',
-                ExpressionAttributeValues={':uid': {'S': strava_user_id}}
-            )
+            plan_data = orjson.loads(plan_json)
 
-            # Update each to is_active=False
-            archived_count = 0
-            for item in existing_plans.get('Items', []):
-                week_start = item['week_start_date']['S']
-                dynamodb.update_item(
-                    TableName='vrc-training-plans',
-                    Key={
-                        'user_id': {'S': strava_user_id},
-                        'week_start_date': {'S': week_start}
-                    },
-                    UpdateExpression='SET is_active = :false',
-                    ExpressionAttributeValues={':false': {'BOOL': False}}
-                )
-                archived_count += 1
-
-            if archived_count > 0:
-                print(f"📦 Archived {archived_count} weeks from previous plan(s)")
-        except Exception as e:
-            print(f"⚠️ Warning: Failed to archive old plans: {e}")
+            if 'weeks' not in plan_data or not plan_data['weeks']:
+                return _dump({'error': 'Invalid plan format - missing weeks array'})
 
-        weeks_saved = 0
+            goal = plan_data.get('goal', 'Training Plan')
+            created_at = plan_data.get('created_at') or datetime.now().strftime('%Y-%m-%d')
 
-        # Save each week to DynamoDB with new plan_id and is_active=True
-        for week in plan_data['weeks']:
-            week_start = week.get('week_start')
-            workouts = week.get('workouts', [])
+            # Generate unique plan ID for this training plan
+            plan_id = str(uuid.uuid4())
+            print(f"📝 Creating new training plan with ID: {plan_id}")
 
-            if not week_start:
-                continue
-
-            # Validate and auto-correct week_start to ensure it's a Monday
+            # Archive old plans: set is_active=False for all existing plans for this user
             try:
-                date_obj = datetime.strptime(week_start, '%Y-%m-%d')
-                if date_obj.weekday() != 0:  # 0 = Monday
-                    # Calculate the Monday of this week
-                    days_since_monday = date_obj.weekday()
-                    monday = date_obj - timedelta(days=days_since_monday)
-                    corrected_date = monday.strftime('%Y-%m-%d')
-                    print(f"⚠️ Auto-corrected week_start from {week_start} ({date_obj.strftime('%A')}) to {corrected_date} (Monday)")
-                    week_start = corrected_date
-            except ValueError:
-                print(f"⚠️ Invalid date format for week_start: {week_start}")
-                continue
+                # Query all existing plans for this user
+                existing_plans = _dynamo().query(
+                    TableName='vrc-training-plans',
+                    KeyConditionExpression='user_id = :uid',
+                    ExpressionAttributeValues={':uid': {'S': strava_user_id}}
+                )
 
-            dynamodb.put_item(
-                TableName='vrc-training-plans',
-                Item={
+                # Update each to is_active=False
+                archived_count = 0
+                for item in existing_plans.get('Items', []):
+                    week_start = item['week_start_date']['S']
+                    _dynamo().update_item(
+                        TableName='vrc-training-plans',
+                        Key={
+                            'user_id': {'S': strava_user_id},
+                            'week_start_date': {'S': week_start}
+                        },
+                        UpdateExpression='SET is_active = :false',
+                        ExpressionAttributeValues={':false': {'BOOL': False}}
+                    )
+                    archived_count += 1
+
+                if archived_count > 0:
+                    print(f"📦 Archived {archived_count} weeks from previous plan(s)")
+            except Exception as e:
+                print(f"⚠️ Warning: Failed to archive old plans: {e}")
+
+            # Collect one item per week (keyed by week_start so a repeated week
+            # keeps the last definition, as sequential puts would)
+            week_items = {}
+            for week in plan_data['weeks']:
+                week_start = week.get('week_start')
+                workouts = week.get('workouts', [])
+
+                if not week_start:
+                    continue
+
+                # Validate and auto-correct week_start to ensure it's a Monday
+                try:
+                    date_obj = datetime.strptime(week_start, '%Y-%m-%d')
+                    if date_obj.weekday() != 0:  # 0 = Monday
+                        # Calculate the Monday of this week
+                        days_since_monday = date_obj.weekday()
+                        monday = date_obj - timedelta(days=days_since_monday)
+                        corrected_date = monday.strftime('%Y-%m-%d')
+                        print(f"⚠️ Auto-corrected week_start from {week_start} ({date_obj.strftime('%A')}) to {corrected_date} (Monday)")
+                        week_start = corrected_date
+                except ValueError:
+                    print(f"⚠️ Invalid date format for week_start: {week_start}")
+                    continue
+
+                week_items[week_start] = {
                     'user_id': {'S': strava_user_id},
                     'week_start_date': {'S': week_start},
                     'plan_id': {'S': plan_id},
                     'is_active': {'BOOL': True},
                     'goal': {'S': goal},
                     'created_at': {'S': created_at},
-                    'plan_data': {'S': json.dumps({
-                        'workouts': workouts,
-                        'goal': goal
-                    })}
+                    'plan_data': _plan_data_attr(goal, workouts)
                 }
-            )
-            weeks_saved += 1
-
-        print(f"✅ Saved {weeks_saved} weeks for new training plan")
 
-        return json.dumps({
-            'success': True,
-            'message': f'Training plan saved successfully! {weeks_saved} weeks stored.',
-            'plan_id': plan_id,
-            'goal': goal,
-            'weeks': weeks_saved
-        })
-
-    except json.JSONDecodeError as e:
-        return json.dumps({'error': f'Invalid JSON format: {str(e)}'})
-    except Exception as e:
-        return json.dumps({'error': f'Failed to save plan: {str(e)}'})
-
-
-@tool
-def get_training_plan(strava_user_id: str, week_start_date: str = None) -> str:
-    """
-    Get the training plan for a specific week (or current week if not specified).
+            # Save all weeks to DynamoDB with new plan_id and is_active=True
+            weeks_saved = _batch_put_items('vrc-training-plans', list(week_items.values()))
 
-    Use this to retrieve the athlete's plan so you can check their progress or make adjustments.
+            print(f"✅ Saved {weeks_saved} weeks for new training plan")
 
-    Args:
-        strava_user_id: Strava user ID
-        week_start_date: Optional week start date in format "2025-10-21" (Monday).
-                        If None, returns current week's plan.
+            return _dump({
+                'success': True,
+                'message': f'Training plan saved successfully! {weeks_saved} weeks stored.',
+                'plan_id': plan_id,
+                'goal': goal,
+                'weeks': weeks_saved
+            })
 
-    Returns:
-        JSON string with that week's plan including completion status, or error if no plan exists
-    """
+        except orjson.JSONDecodeError as e:
+            return _dump({'error': f'Invalid JSON format: {str(e)}'})
+        except Exception as e:
+            return _dump({'error': f'Failed to save plan: {str(e)}'})
+        finally:
+            _invalidate_plan_cache(strava_user_id)
+
+
+def _read_training_plan(strava_user_id: str, week_start_date: str = None) -> Dict[str, Any]:
+    """Load one week of the athlete's active plan (current week if no date), as returned by get_training_plan"""
+    key = (strava_user_id, week_start_date)
+    with _PLAN_CACHE_LOCK:
+        cached = _PLAN_CACHE.get(key)
+        generation = _PLAN_CACHE_GENERATION.get(strava_user_id, 0)
+    if cached is not None:
+        return cached
+
+    plan = _query_training_plan(strava_user_id, week_start_date)
+    # Errors aren't cached so the next call retries storage
+    if 'error' not in plan:
+        with _PLAN_CACHE_LOCK:
+            if _PLAN_CACHE_GENERATION.get(strava_user_id, 0) == generation:
+                _PLAN_CACHE[key] = plan
+    return plan
+
+
+def _query_training_plan(strava_user_id: str, week_start_date: str = None) -> Dict[str, Any]:
+    """Query storage for one plan week, falling back to other days of that week"""
     try:
         # If no date provided, get current week's Monday
         if not week_start_date:
@@ -476,7 +1050,7 @@ def get_training_plan(strava_user_id: str, week_start_date: str = None) -> str:
         print(f"🔍 get_training_plan: Querying for user_id={strava_user_id}, week_start_date={week_start_date}")
 
         # First try exact Monday match
-        response = dynamodb.get_item(
+        response = _dynamo().get_item(
             TableName='vrc-training-plans',
             Key={
                 'user_id': {'S': strava_user_id},
@@ -503,7 +1077,7 @@ def get_training_plan(strava_user_id: str, week_start_date: str = None) -> str:
                 if check_date == week_start_date:
                     continue  # Already checked Monday
 
-                response = dynamodb.get_item(
+                response = _dynamo().get_item(
                     TableName='vrc-training-plans',
                     Key={
                         'user_id': {'S': strava_user_id},
@@ -523,29 +1097,91 @@ def get_training_plan(strava_user_id: str, week_start_date: str = None) -> str:
                         response = {}  # Keep searching
 
         if 'Item' not in response:
-            return json.dumps({
+            return {
                 'found': False,
                 'message': f'No training plan found for week of {week_start_date}',
                 'week_start': week_start_date
-            })
+            }
 
         item = response['Item']
-        plan_data = json.loads(item['plan_data']['S'])
+        plan_data = _plan_data_from_attr(item['plan_data'])
 
-        return json.dumps({
+        return {
             'found': True,
             'week_start': week_start_date,
             'goal': item.get('goal', {}).get('S', 'Training Plan'),
             'created_at': item.get('created_at', {}).get('S', 'Unknown'),
             'workouts': plan_data.get('workouts', [])
-        }, indent=2)
+        }
 
     except Exception as e:
-        return json.dumps({'error': f'Failed to retrieve plan: {str(e)}'})
+        return {'error': f'Failed to retrieve plan: {str(e)}'}
 
 
-@tool
-def update_workout_in_plan(strava_user_id: str, week_start_date: str, day: str, updates: str) -> str:
+@tool(context=True)
+def get_training_plan(week_start_date: str = None, tool_context: ToolContext = None) -> str:
+    """
+    Get the training plan for a specific week (or current week if not specified).
+
+    Use this to retrieve the athlete's plan so you can check their progress or make adjustments.
+
+    Args:
+        week_start_date: Optional week start date in format "2025-10-21" (Monday).
+                        If None, returns current week's plan.
+
+    Returns:
+        JSON string with that week's plan including completion status, or error if no plan exists
+    """
+    strava_user_id = _context_user_id(tool_context)
+    return _dump(_read_training_plan(strava_user_id, week_start_date))
+
+
+def _update_workout_in_place(
+    strava_user_id: str,
+    week_start_date: str,
+    day: str,
+    update_data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Apply updates to the day's first workout with a single conditional UpdateItem.
+
+    Returns:
+        The updated workout, or None if the week isn't an active plan stored in
+        the native map layout with a workout on that day
+    """
+    names = {'#day': day}
+    values = {':true': {'BOOL': True}}
+    assignments = []
+    for i, (key, value) in enumerate(update_data.items()):
+        names[f'#f{i}'] = key
+        values[f':v{i}'] = _to_attr(value)
+        assignments.append(f'plan_data.workouts_by_day.#day[0].#f{i} = :v{i}')
+
+    try:
+        response = _dynamo().update_item(
+            TableName='vrc-training-plans',
+            Key={
+                'user_id': {'S': strava_user_id},
+                'week_start_date': {'S': week_start_date}
+            },
+            UpdateExpression='SET ' + ', '.join(assignments),
+            ConditionExpression='is_active = :true AND attribute_exists(plan_data.workouts_by_day.#day[0])',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues='ALL_NEW'
+        )
+    except ClientError as e:
+        # A failed condition (or a legacy string plan_data the path can't address)
+        # means the caller should use the read-modify-write path
+        if e.response['Error']['Code'] in ('ConditionalCheckFailedException', 'ValidationException'):
+            return None
+        raise
+
+    workouts_by_day = response['Attributes']['plan_data']['M']['workouts_by_day']['M']
+    return _from_attr(workouts_by_day[day]['L'][0])
+
+
+@tool(context=True)
+def update_workout_in_plan(week_start_date: str, day: str, updates: str, tool_context: ToolContext) -> str:
     """
     Update a specific workout in the training plan.
 
@@ -553,7 +1189,6 @@ def update_workout_in_plan(strava_user_id: str, week_start_date: str, day: str,
     or to modify workout details.
 
     Args:
-        strava_user_id: Strava user ID
         week_start_date: Week start date in format "2025-10-21" (Monday)
         day: Day of week ("Monday", "Tuesday", etc.)
         updates: JSON string with fields to update, e.g.:
@@ -569,70 +1204,88 @@ def update_workout_in_plan(strava_user_id: str, week_start_date: str, day: str,
     Returns:
         Confirmation message or error
     """
-    try:
-        # Get the existing plan
-        response = dynamodb.get_item(
-            TableName='vrc-training-plans',
-            Key={
-                'user_id': {'S': strava_user_id},
-                'week_start_date': {'S': week_start_date}
-            }
-        )
-
-        if 'Item' not in response:
-            return json.dumps({'error': f'No plan found for week of {week_start_date}'})
+    strava_user_id = _context_user_id(tool_context)
+    # Serialize plan writes per athlete so concurrent tool calls can't overwrite each other
+    with _plan_write_lock(strava_user_id):
+        try:
+            update_data = orjson.loads(updates)
+
+            # Fast path: patch the workout in place with one conditional UpdateItem.
+            # Legacy JSON-string plans, archived/missing weeks and day changes fall
+            # through to the read-modify-write path below.
+            if update_data and update_data.get('day', day) == day:
+                workout = _update_workout_in_place(strava_user_id, week_start_date, day, update_data)
+                if workout is not None:
+                    return _dump({
+                        'success': True,
+                        'message': f'Workout updated successfully for {day}, week of {week_start_date}',
+                        'updated_workout': workout
+                    })
 
-        # Check if plan is active
-        item = response['Item']
-        is_active = item.get('is_active', {}).get('BOOL', False)
-        if not is_active:
-            return json.dumps({'error': f'Plan found but is not active (archived). Cannot update archived plans.'})
-
-        # Parse plan data
-        plan_data = json.loads(item['plan_data']['S'])
-        workouts = plan_data.get('workouts', [])
-
-        # Find the workout for the specified day
-        workout_found = False
-        for workout in workouts:
-            if workout.get('day') == day:
-                # Parse updates
-                update_data = json.loads(updates)
-
-                # Merge updates into workout
-                for key, value in update_data.items():
-                    workout[key] = value
-
-                workout_found = True
-                break
+            # Get the existing plan
+            response = _dynamo().get_item(
+                TableName='vrc-training-plans',
+                Key={
+                    'user_id': {'S': strava_user_id},
+                    'week_start_date': {'S': week_start_date}
+                }
+            )
 
-        if not workout_found:
-            return json.dumps({'error': f'No workout found for {day} in week of {week_start_date}'})
+            if 'Item' not in response:
+                return _dump({'error': f'No plan found for week of {week_start_date}'})
 
-        # Save updated plan back to DynamoDB, preserving all fields
-        dynamodb.put_item(
-            TableName='vrc-training-plans',
-            Item={
-                'user_id': {'S': strava_user_id},
-                'week_start_date': {'S': week_start_date},
-                'plan_id': item.get('plan_id', {'S': 'legacy'}),  # Preserve plan_id
-                'is_active': item.get('is_active', {'BOOL': True}),  # Preserve is_active
-                'goal': item.get('goal', {'S': 'Training Plan'}),
-                'created_at': item.get('created_at', {'S': datetime.now().strftime('%Y-%m-%d')}),
-                'plan_data': {'S': json.dumps(plan_data)}
-            }
-        )
+            # Check if plan is active
+            item = response['Item']
+            is_active = item.get('is_active', {}).get('BOOL', False)
+            if not is_active:
+                return _dump({'error': f'Plan found but is not active (archived). Cannot update archived plans.'})
+
+            # Parse plan data
+            plan_data = _plan_data_from_attr(item['plan_data'])
+            workouts = plan_data.get('workouts', [])
+
+            # Find the workout for the specified day
+            workout_found = False
+            for workout in workouts:
+                if workout.get('day') == day:
+                    # Merge updates into workout
+                    for key, value in update_data.items():
+                        workout[key] = value
+
+                    workout_found = True
+                    break
+
+            if not workout_found:
+                return _dump({'error': f'No workout found for {day} in week of {week_start_date}'})
+
+            # Save updated plan back to DynamoDB, preserving all fields (this also
+            # migrates legacy JSON-string plans to the native map layout)
+            goal = item.get('goal', {'S': 'Training Plan'})
+            _dynamo().put_item(
+                TableName='vrc-training-plans',
+                Item={
+                    'user_id': {'S': strava_user_id},
+                    'week_start_date': {'S': week_start_date},
+                    'plan_id': item.get('plan_id', {'S': 'legacy'}),  # Preserve plan_id
+                    'is_active': item.get('is_active', {'BOOL': True}),  # Preserve is_active
+                    'goal': goal,
+                    'created_at': item.get('created_at') or {'S': datetime.now().strftime('%Y-%m-%d')},
+                    'plan_data': _plan_data_attr(plan_data.get('goal') or goal['S'], workouts)
+                }
+            )
 
-        return json.dumps({
-            'success': True,
-            'message': f'Workout updated successfully for {day}, week of {week_start_date}',
-            'updated_workout': workout
-        }, indent=2)
+            return _dump({
+                'success': True,
+                'message': f'Workout updated successfully for {day}, week of {week_start_date}',
+                'updated_workout': workout
+            })
 
-    except json.JSONDecodeError as e:
-        return json.dumps({'error': f'Invalid JSON in updates: {str(e)}'})
-    except Exception as e:
-        return json.dumps({'error': f'Failed to update workout: {str(e)}'})
+        except orjson.JSONDecodeError as e:
+            return _dump({'error': f'Invalid JSON in updates: {str(e)}'})
+        except Exception as e:
+            return _dump({'error': f'Failed to update workout: {str(e)}'})
+        finally:
+            _invalidate_plan_cache(strava_user_id)
 
 
 # Configure persistent memory with summarization
@@ -659,6 +1312,34 @@ Format as structured bullet points:
 ## Recent Progress & Achievements
 """
 
+# Background writer for AgentCore Memory; drained before the process exits.
+# A single worker keeps turns stored in the order they were added.
+_MEM_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='memory-write')
+atexit.register(_MEM_POOL.shutdown, wait=True)
+
+MEMORY_SAVE_ATTEMPTS = 3
+
+
+def _persist_turn(memory_session, text: str, role: MessageRole):
+    """Save one conversation turn to AgentCore Memory, retrying with exponential backoff.
+
+    Submitted to _MEM_POOL so persistence never blocks the streamed response.
+    """
+    for attempt in range(MEMORY_SAVE_ATTEMPTS):
+        try:
+            result = memory_session.add_turns(messages=[ConversationalMessage(text, role)])
+            print(f"✅ Stored message with Event ID: {result['eventId']}, Role: {role.value}")
+            return
+        except Exception as e:
+            if attempt < MEMORY_SAVE_ATTEMPTS - 1:
+                time.sleep(0.2 * (2 ** attempt))
+                continue
+
+            print(f"❌ Memory save error after {MEMORY_SAVE_ATTEMPTS} attempts: {e}")
+            import traceback
+            print(f"Full traceback: {traceback.format_exc()}")
+
+
 # Memory Hook Provider for AgentCore Memory persistence
 class MemoryHookProvider(HookProvider):
     """Custom hook provider that persists messages to AgentCore Memory using MemorySession"""
@@ -674,16 +1355,19 @@ class MemoryHookProvider(HookProvider):
 
             if recent_turns:
                 # Format conversation history for context
-                context_messages = []
-                for turn in recent_turns:
-                    for message in turn:
-                        role = message['role']
-                        content = message['content']['text']
-                        context_messages.append(f"{role}: {content}")
-
-                context = "\n".join(context_messages)
-                # Add context to agent's system prompt
-                event.agent.system_prompt += f"\n\nRecent conversation:\n{context}"
+                context_messages = [
+                    f"{message['role']}: {message['content']['text']}"
+                    for turn in recent_turns
+                    for message in turn
+                ]
+
+                # Add context to agent's system prompt in a single join
+                event.agent.system_prompt = "\n".join([
+                    event.agent.system_prompt,
+                    "",
+                    "Recent conversation:",
+                    *context_messages
+                ])
                 print(f"✅ Loaded {len(recent_turns)} conversation turns from AgentCore Memory")
 
         except Exception as e:
@@ -697,13 +1381,8 @@ class MemoryHookProvider(HookProvider):
                 message_text = messages[-1]["content"][0]["text"]
                 message_role = MessageRole.USER if messages[-1]["role"] == "user" else MessageRole.ASSISTANT
 
-                # Save to AgentCore Memory using MemorySession
-                result = self.memory_session.add_turns(
-                    messages=[ConversationalMessage(message_text, message_role)]
-                )
-
-                event_id = result['eventId']
-                print(f"✅ Stored message with Event ID: {event_id}, Role: {message_role.value}")
+                # Save to AgentCore Memory in the background so the write stays off the response path
+                _MEM_POOL.submit(_persist_turn, self.memory_session, message_text, message_role)
 
         except Exception as e:
             print(f"❌ Memory save error: {e}")
@@ -717,13 +1396,79 @@ class MemoryHookProvider(HookProvider):
         print("✅ Memory hooks registered")
 
 
-# Agent factory function - creates agent per-request with AgentCore Memory session persistence
+# Request-invariant agent configuration, built once at import. Keep _SYSTEM_PROMPT free of
+# per-user interpolation so it stays byte-identical and the Bedrock prompt cache can hit.
+MODEL_ID = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
+
+_SYSTEM_PROMPT = """You are V, the coach for Village Run Club members: a supportive friend first, expert second. Use "we" language, balance encouragement with constructive feedback, and stay data-driven but human-first.
+
+# VOICE
+Warm, casual but intelligent, direct when needed. Emojis only for genuine big wins (💪 🔥). Acknowledge effort first, then analyze with specific numbers from their Strava, explain what it means, give specific next steps, and end by asking about their goals or next race. Sound like a friend's tip ("You've been crushing it - 51 miles last week!"), never robotic ("Data indicates...", "Insufficient recovery detected") or generic ("Great job!").
+
+# TOOLS
+You can read recent activities, athlete stats, detailed activity data (use get_activities_details_bulk() for several activities in one call) and club member activities.
+⚠️ ALWAYS use calculate() for ALL math (totals, averages, paces, percentages) - never do mental math or approximate.
+
+# TRAINING PLANS
+You generate plans, match activities and write summaries; save_training_plan, get_training_plan and update_workout_in_plan only store what you create.
+
+Creating: when an athlete mentions a goal, offer a plan. Ask their goal, date, current weekly mileage and constraints. Plan 8-16 weeks with gradual progression and base → build → peak → taper; week_start MUST be a Monday; use calculate() for paces. Give a BRIEF preview (3-4 sentences, e.g. "12 weeks, 40→60 miles, 2 quality sessions per week"), and once approved IMMEDIATELY call save_training_plan() with all workouts completed=false - save BEFORE elaborating on details.
+
+Checking progress: get_training_plan() (defaults to current week) and get_recent_activities(), then use your judgment to match activities to planned workouts (day, distance, pace, type - a Tuesday 6.2 mi can match Monday's 6 mi). Mark each match with update_workout_in_plan(): completed=true, actual_distance, actual_pace, actual_hr, activity_id and an ai_summary in your voice ("Planned 6 mi at 9:30/mi, ran 6.2 at 9:25 - awesome!").
+
+Adjusting: listen (injury, travel, stress, fatigue), modify workouts with update_workout_in_plan() and explain why. Be proactive: celebrate completed weeks and address misses compassionately. Plans are guidelines, not contracts.
+
+# PLAN CARDS
+To show a week (after get_training_plan(), for weekly progress, or when asked "show me my plan"), wrap its JSON in [TRAINING_PLAN_CARD]...[/TRAINING_PLAN_CARD] with schema {goal, week_start, workouts:[{day,type,distance,target_pace,target_hr,notes,completed,actual_distance,actual_pace,actual_hr,ai_summary}]}; the frontend renders it inline as an interactive card, so add your own context in text before/after it."""
+
+_TOOLS = [
+    calculate,
+    get_recent_activities,
+    get_athlete_stats,
+    get_activity_details,
+    get_activities_details_bulk,
+    get_club_members_recent_activities,
+    save_training_plan,
+    get_training_plan,
+    update_workout_in_plan,
+]
+
+
+@functools.lru_cache(maxsize=1)
+def _bedrock_model() -> BedrockModel:
+    """Bedrock model provider shared by every agent so its boto3 client is created once
+
+    The system prompt and tool specs are identical on every request, so both get a
+    Bedrock cache point and later turns skip re-prefilling them.
+    """
+    with _BOTO_CLIENT_LOCK:
+        return BedrockModel(
+            model_id=MODEL_ID,
+            boto_session=_boto_session(),
+            # Streamed responses can pause between chunks, so keep Strands' 120s read timeout
+            boto_client_config=_AWS_CLIENT_CONFIG.merge(Config(read_timeout=120)),
+            cache_config=CacheConfig(system_prompt_ttl=True, tools_ttl=True)
+        )
+
+
+@functools.lru_cache(maxsize=4)
+def _session_manager(memory_id: str) -> MemorySessionManager:
+    """MemorySessionManager per memory ID, shared across requests so its boto3 client is reused"""
+    with _BOTO_CLIENT_LOCK:
+        return MemorySessionManager(
+            memory_id=memory_id,
+            boto3_session=_boto_session(),
+            boto_client_config=_AWS_CLIENT_CONFIG
+        )
+
+
+# Agent factory function - creates an agent for a session with AgentCore Memory session persistence
 def create_agent_with_session(session_id: str, strava_user_id: str, conversation_history: list = None) -> Agent:
     """Create a new Agent instance with AgentCore Memory persistence using MemorySession.
 
     Args:
         session_id: Unique session identifier for this conversation
-        strava_user_id: Strava user ID for agent identification
+        strava_user_id: Strava user ID for agent identification and tool context
         conversation_history: Optional list of previous messages to load into agent
 
     Returns:
@@ -734,8 +1479,8 @@ def create_agent_with_session(session_id: str, strava_user_id: str, conversation
     if not memory_id:
         raise ValueError('BEDROCK_AGENTCORE_MEMORY_ID environment variable not set')
 
-    # Create MemorySessionManager and MemorySession
-    session_manager = MemorySessionManager(memory_id=memory_id, region_name='us-east-1')
+    # Reuse the cached MemorySessionManager and create a MemorySession
+    session_manager = _session_manager(memory_id)
     memory_session = session_manager.create_memory_session(
         actor_id=session_id,  # Use session_id as actor_id
         session_id=session_id
@@ -746,285 +1491,275 @@ def create_agent_with_session(session_id: str, strava_user_id: str, conversation
     agent = Agent(
         agent_id=f"v-coach-{strava_user_id}",  # Fixed agent ID per user
         name="V - Village Run Club Coach",
-        model="global.anthropic.claude-sonnet-4-5-20250929-v1:0",
+        model=_bedrock_model(),
         messages=conversation_history or [],  # Load conversation history
-        system_prompt="""You are V, the supportive and knowledgeable coach for Village Run Club members.
+        system_prompt=_SYSTEM_PROMPT,
+        tools=_TOOLS,
+        # Tools read the athlete's ID from state instead of taking it as a model argument
+        state={'strava_user_id': strava_user_id},
+        # Run independent tool calls from one model turn in parallel
+        tool_executor=ConcurrentToolExecutor()
+    )
 
-# WHO YOU ARE
+    return agent
 
-You're V - a coach who genuinely cares about each athlete's progress. You're a supportive friend first, expert second. You use "we" language because you're in this together with every runner. You balance encouragement with real, constructive feedback. You're data-driven but always human-first.
+# Warm agents keyed by session_id (LRU) so returning users skip agent construction and
+# the memory history reload
+AGENT_POOL_MAX_SIZE = 256
+_AGENT_POOL: "OrderedDict[str, Agent]" = OrderedDict()
 
-# YOUR VOICE
+# Per-session concurrency gate. Agents aren't coroutine-safe, so a session's turns
+# (including a double-tapped send) run one at a time; throughput within a session is
+# sequential by design, while different sessions run concurrently without limit.
+# Idle gates are evicted LRU once the map passes its cap. A gate counts every turn that
+# holds or is waiting on its lock, and is only evicted at zero.
+SESSION_LOCKS_MAX_SIZE = 1024
 
-- Warm, encouraging, but direct when needed
-- Use casual but intelligent language
-- Emojis very sparingly (💪 🔥 for genuine big wins only)
-- Start with acknowledgment, then provide analysis
-- Ask questions to understand goals better
-- Celebrate effort and consistency, not just results
 
-# DATA & TOOLS
+class _SessionGate:
+    """A session's lock plus the number of turns holding or waiting for it"""
+    __slots__ = ('lock', 'users')
 
-You have access to:
-- Recent activities (runs, rides, swims, etc.)
-- Athlete stats (all-time, year-to-date, recent)
-- Detailed activity data (pace, heart rate, power, elevation)
-- Club member activities for comparison
-- A calculator tool for accurate mathematical calculations
-
-⚠️ CRITICAL: ALWAYS use the calculate() tool for ALL math:
-- Weekly totals: calculate("6.2 + 8.5 + 5.1 + 7.3 + 10.2 + 4.8 + 9.1")
-- Averages: calculate("(51 + 50 + 48) / 3")
-- Percentages: calculate("50 * 1.1")
-- NEVER do mental math or approximate - always use calculate()
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
 
-# YOUR APPROACH
 
-When analyzing training:
-1. **Acknowledge first** - Recognize their effort/progress
-2. **Use specific data** - Reference actual numbers from their Strava
-3. **Provide context** - Explain what the data means
-4. **Give actionable next steps** - Be specific about what to do
+_SESSION_LOCKS: "OrderedDict[str, _SessionGate]" = OrderedDict()
 
-Structure responses like:
-- Start warm: "You've been putting in the work!" or "Let me break down what I'm seeing"
-- Present data: Use calculate() for precise numbers, reference specific activities
-- Provide insight: Explain patterns, trends, what's working
-- Suggest next steps: Specific, actionable recommendations
-- End with engagement: Ask about their goals or next race
 
-# EXAMPLES OF YOUR VOICE
+@contextlib.asynccontextmanager
+async def _session_lock(session_id: str):
+    """Hold the session's lock for one turn"""
+    gate = _SESSION_LOCKS.get(session_id)
+    if gate is None:
+        gate = _SESSION_LOCKS[session_id] = _SessionGate()
+    _SESSION_LOCKS.move_to_end(session_id)
 
-✅ Good:
-- "You've been crushing it lately - 51 miles last week!"
-- "Those easy runs are looking great. Recovery is where the magic happens."
-- "Solid work. That tempo run shows you're ready for more."
-- "Let's build on this. Here's what I'm thinking..."
+    gate.users += 1
+    try:
+        if len(_SESSION_LOCKS) > SESSION_LOCKS_MAX_SIZE:
+            excess = len(_SESSION_LOCKS) - SESSION_LOCKS_MAX_SIZE
+            idle_ids = [sid for sid, idle_gate in _SESSION_LOCKS.items() if not idle_gate.users]
+            for idle_id in idle_ids[:excess]:
+                del _SESSION_LOCKS[idle_id]
 
-❌ Avoid:
-- "Your mileage is suboptimal"
-- "Insufficient recovery detected"
-- "Data indicates..." (too robotic)
-- "Great job!" (too generic without substance)
+        async with gate.lock:
+            yield
+    finally:
+        gate.users -= 1
 
-# KEY PRINCIPLES
 
-1. Be specific with data (always use calculate() for numbers)
-2. Humans first, metrics second
-3. Constructive feedback feels like a tip from a friend
-4. Show personality - you're V, not a bot
-5. Make training science accessible, not academic
-6. Use "we" language - you're in this together
+def _pool_agent(session_id: str, agent: Agent) -> None:
+    """Mark a session's agent most recently used, evicting the least recently used past the cap"""
+    _AGENT_POOL[session_id] = agent
+    _AGENT_POOL.move_to_end(session_id)
+    while len(_AGENT_POOL) > AGENT_POOL_MAX_SIZE:
+        _AGENT_POOL.popitem(last=False)
 
-The user's strava_user_id will be provided in the context. Remember: you're their coach, their supporter, and their training partner. Let's help them build something great.
 
-# TRAINING PLAN MANAGEMENT
+def _load_conversation_history(memory_session) -> List[Dict[str, Any]]:
+    """Rebuild Strands messages from the last turns stored in AgentCore Memory"""
+    conversation_history = []
+    try:
+        recent_turns = memory_session.get_last_k_turns(k=20)  # Get last 20 turns (10 exchanges)
+        for turn in recent_turns:
+            for message in turn:
+                role = message.get('role', '')
+                content = message.get('content', {})
+                if isinstance(content, dict):
+                    text = content.get('text', '')
+                elif isinstance(content, str):
+                    text = content
+                else:
+                    text = str(content)
 
-You have the ability to create, track, and adjust personalized training plans for athletes. This is one of your most powerful coaching tools.
+                if text:
+                    # Format for Strands Agent: {"role": "user/assistant", "content": [{"text": "..."}]}
+                    conversation_history.append({
+                        "role": role.lower(),
+                        "content": [{"text": text}]
+                    })
+        print(f"📚 Loaded {len(conversation_history)} messages from conversation history")
+    except Exception as e:
+        print(f"⚠️ Failed to load conversation history: {e}")
+    return conversation_history
+
+
+async def _session_agent(session_id: str, strava_user_id: str, memory_session) -> Agent:
+    """Get the session's pooled agent, creating it from memory history if cold (call under _session_lock)"""
+    # A warm agent's messages already hold the conversation; only a cold session
+    # reloads history from AgentCore Memory, off the event loop since the call blocks
+    agent = _AGENT_POOL.get(session_id)
+    if agent is None:
+        conversation_history = await asyncio.to_thread(_load_conversation_history, memory_session)
+        agent = create_agent_with_session(
+            session_id=session_id,
+            strava_user_id=strava_user_id,
+            conversation_history=conversation_history
+        )
+    else:
+        agent.state.set('strava_user_id', strava_user_id)
+    _pool_agent(session_id, agent)
+    return agent
 
-**GOLDEN RULE: When creating plans, keep previews BRIEF (3-4 sentences) and SAVE IMMEDIATELY after approval. Details can come AFTER saving.**
 
-Here's how it works:
+# Partial prompts that hint the final question will need the athlete's plan
+_PLAN_HINT_RE = re.compile(r"\b(plan|week|workout)", re.IGNORECASE)
 
-## When to Offer a Plan
 
-When an athlete mentions a goal (race, PR, fitness milestone), offer to create a structured training plan:
-- "I can create a personalized training plan to help you hit that goal. Want me to put something together?"
-- "Let me map out a plan that'll get you there. How many weeks until race day?"
+async def _prewarm_session(session_id: str, strava_user_id: str, memory_session, partial_prompt: str) -> None:
+    """Do the request-independent setup for a turn while the user is still typing.
 
-## How to Create a Plan (YOUR workflow)
+    Builds the session's agent and fetches Strava tokens; if the partial prompt mentions
+    the plan, the current week is read into the plan cache. Only read-only work is done,
+    so nothing needs undoing if the final prompt asks for something else.
+    """
+    async def warm_agent():
+        async with _session_lock(session_id):
+            await _session_agent(session_id, strava_user_id, memory_session)
+
+    results = await asyncio.gather(
+        warm_agent(),
+        StravaTools.get_user_tokens(strava_user_id),
+        *([asyncio.to_thread(_read_training_plan, strava_user_id)] if _PLAN_HINT_RE.search(partial_prompt) else []),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"⚠️ Prewarm step failed: {result}")
 
-1. **Ask the key questions:**
-   - What's their goal? (race distance, target time, or general fitness goal)
-   - When is the race/goal date?
-   - What's their current weekly mileage?
-   - Any constraints? (time, injuries, travel)
 
-2. **Do the math - YOU figure this out:**
-   - Calculate the MONDAY date for each week (week_start MUST be Mondays!)
-   - Use calculate() to determine appropriate paces (easy, tempo, interval, long run)
-   - Design weekly structure (easy runs, workouts, long runs, rest days)
-   - Plan mileage progression (typically 8-16 weeks, build gradually)
-   - Include periodization (base → build → peak → taper phases)
+# Run the runtime's event loops on uvloop when available. The policy must be set before
+# the app starts: AgentCore's worker loop comes from asyncio.new_event_loop(), and
+# uvicorn picks uvloop up on its own.
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    print("⚠️ uvloop not installed; using the default asyncio event loop")
 
-3. **Show them a BRIEF preview first:**
-   - Present HIGH-LEVEL overview only: total weeks, mileage range, key workout types
-   - Example: "I'm thinking 12 weeks, building from 40→60 miles with 2 quality sessions per week"
-   - Keep it to 3-4 sentences max
-   - Get their buy-in: "Sound good? I can save this plan and we'll track your progress."
-
-4. **IMMEDIATELY save the plan after they approve:**
-   - Use save_training_plan() with the complete JSON structure
-   - Include: goal, weeks array with workouts (day, type, distance, target_pace, target_hr, notes)
-   - Set all workouts to completed=false initially
-   - DO THIS BEFORE elaborating on details
-
-5. **AFTER saving, you can discuss specifics:**
-   - Now you can break down individual weeks if they want details
-   - Show specific workout examples from the saved plan
-   - Explain the periodization phases
-
-**CRITICAL WORKFLOW:**
-1. Brief high-level preview (3-4 sentences)
-2. Get approval
-3. SAVE FIRST using save_training_plan()
-4. THEN elaborate on details if needed
-
-**WHY THIS MATTERS:**
-- Saving first ensures the plan is stored even if the conversation is interrupted
-- You can always retrieve and discuss details later using get_training_plan()
-- Keep previews concise to avoid timeouts before saving
-
-**YOU generate the plan. YOU do the math. YOU create the structure. The tool just stores what you create.**
-
-## How to Check Progress (YOUR judgment)
-
-When an athlete asks about their progress or you proactively check in:
-
-1. **Get their current plan:**
-   - Use get_training_plan() (defaults to current week if no date specified)
-
-2. **Get their recent activities:**
-   - Use get_recent_activities() to see what they've actually done
-
-3. **YOU do the matching:**
-   - Look at the plan vs what they did
-   - Use YOUR judgment to match Strava activities to planned workouts
-   - Consider: day of week, distance, pace, workout type
-   - A "6 mile easy run" on Monday might match a Tuesday Strava run that's 6.2 miles - YOU decide
-
-4. **YOU write the summary:**
-   - Write it in YOUR voice: "Perfect! You nailed that easy pace. HR was right in the zone."
-   - Be specific: "You planned 6 mi at 9:30/mi, ran 6.2 mi at 9:25/mi - awesome!"
-   - Be constructive if off: "That tempo felt tough, huh? Let's dial back the pace next time."
-
-5. **Update the plan:**
-   - Use update_workout_in_plan() for each matched workout
-   - Mark completed=true
-   - Add actual_distance, actual_pace, actual_hr, activity_id
-   - Include your ai_summary in YOUR voice
-
-**CRITICAL: YOU are the fuzzy matcher. YOU are the analyst. YOU write the summaries. The tools just store your assessments.**
+# Initialize AgentCore app
+app = BedrockAgentCoreApp()
 
-## How to Adjust Plans
-
-Athletes need flexibility. When they ask for changes or life happens:
-
-1. **Listen to their situation:**
-   - Injury, travel, life stress, feeling great, feeling tired
-
-2. **Make smart adjustments:**
-   - Use YOUR coaching knowledge to modify workouts
-   - Get the week's plan, update specific workout(s) as needed
-   - Explain your reasoning: "Let's swap that tempo for an easy run. Recovery is key right now."
+# Model deltas are coalesced before being streamed: a chunk is sent once it reaches
+# SSE_FLUSH_CHARS characters or SSE_FLUSH_MS after its first delta, whichever comes first
+SSE_FLUSH_CHARS = int(os.getenv('SSE_FLUSH_CHARS', '64'))
+SSE_FLUSH_MS = int(os.getenv('SSE_FLUSH_MS', '40'))
 
-3. **Update the plan:**
-   - Use update_workout_in_plan() to modify workout details
-   - Update distance, pace, type, notes as needed
-
-## Daily/Weekly Check-ins
-
-Be proactive about plan management:
-- When you see new Strava activities, check if they match the current week's plan
-- Offer weekly summaries: "Let's see how this week went..."
-- Celebrate completions: "You hit every workout this week! That's what I'm talking about!"
-- Address misses compassionately: "I see you missed Thursday's tempo. Everything okay?"
-
-## Important Reminders
-
-- **YOU do the intelligent work.** The tools (save_training_plan, get_training_plan, update_workout_in_plan) are just dumb storage. They save and retrieve data. YOU generate plans, YOU match activities, YOU write summaries, YOU make coaching decisions.
-- **Always show previews before saving.** Get athlete buy-in.
-- **Write summaries in YOUR voice.** Not generic. Not robotic. Supportive, specific, constructive.
-- **Be flexible.** Training plans are guidelines, not contracts. Adjust based on how the athlete is responding.
-- **Use calculate() for all pace calculations.** Be precise with the math.
-
-## Displaying Training Plans in the UI
-
-When you want to show an athlete their training plan week in a beautiful card format, use this special syntax:
-
-```
-[TRAINING_PLAN_CARD]
-{
-  "goal": "Sub-3 Marathon - April 20, 2025",
-  "week_start": "2025-10-21",
-  "workouts": [
-    {
-      "day": "Monday",
-      "type": "Easy Run",
-      "distance": 6,
-      "target_pace": "9:30-10:00/mi",
-      "target_hr": "<145 bpm",
-      "notes": "Recovery pace, conversational",
-      "completed": false,
-      "actual_distance": null,
-      "actual_pace": null,
-      "actual_hr": null,
-      "ai_summary": null
-    }
-  ]
-}
-[/TRAINING_PLAN_CARD]
-```
-
-**When to display plan cards:**
-- After getting a plan with get_training_plan()
-- When showing weekly progress
-- When the athlete asks "show me my plan" or similar
-
-**What gets rendered:**
-- Beautiful glassmorphism card with orange accents
-- Checkboxes that show completion status
-- Planned vs actual metrics side-by-side
-- Your AI summaries for completed workouts
-- Expandable/collapsible interface
-
-**How to use it:**
-1. Call get_training_plan() to get the week's data
-2. Present the card using [TRAINING_PLAN_CARD] syntax with the JSON
-3. Add context around the card in your regular text (before/after)
-4. The frontend will automatically render it beautifully
-
-Example response:
-"Let me pull up this week's plan for you!
-
-[TRAINING_PLAN_CARD]
-{...plan data from get_training_plan()...}
-[/TRAINING_PLAN_CARD]
-
-You're crushing it so far - 3 out of 5 workouts completed and all looking solid!"
-
-The card will appear inline with your message, styled to match the dark theme.""",
-        tools=[
-            calculate,
-            get_recent_activities,
-            get_athlete_stats,
-            get_activity_details,
-            get_club_members_recent_activities,
-            save_training_plan,
-            get_training_plan,
-            update_workout_in_plan
-        ]
-    )
+_STREAM_END = object()
 
-    return agent
+# Terminal stream event, shared rather than rebuilt per response. The runtime owns SSE
+# framing (it serializes each yielded value into a "data:" frame), so events are yielded
+# as plain dicts, not pre-encoded bytes.
+_DONE_EVENT = {'type': 'done'}
 
-# Initialize AgentCore app
-app = BedrockAgentCoreApp()
+
+def _event_text(event: Dict[str, Any]) -> Optional[str]:
+    """Text delta carried by a Strands stream event; stream_async emits model text as {"data": str}"""
+    text = event.get('data')
+    return text if isinstance(text, str) else None
+
+
+async def _coalesced_text(events: AsyncIterator[Any]) -> AsyncIterator[str]:
+    """Yield the text of a Strands event stream in chunks of SSE_FLUSH_CHARS or SSE_FLUSH_MS.
+
+    The stream is consumed by a single producer task and read here through a queue, so the
+    flush timeout never cancels the agent's generator mid-step.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for event in events:
+                text = _event_text(event)
+                if text:
+                    queue.put_nowait(text)
+            queue.put_nowait(_STREAM_END)
+        except Exception as error:
+            queue.put_nowait(error)
+
+    producer = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    buffer: List[str] = []
+    buffered_chars = 0
+    deadline = None
+    try:
+        while True:
+            try:
+                if deadline is None:
+                    item = await queue.get()
+                else:
+                    item = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if item is not None:
+                if not buffer:
+                    deadline = loop.time() + SSE_FLUSH_MS / 1000
+                buffer.append(item)
+                buffered_chars += len(item)
+                if buffered_chars < SSE_FLUSH_CHARS:
+                    continue
+
+            yield ''.join(buffer)
+            buffer.clear()
+            buffered_chars = 0
+            deadline = None
+
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        producer.cancel()
+
+
+# Requests answered without a model turn: a bare "show me my plan" / "pull up this week"
+# renders the current week's card directly. Anything more specific goes to the agent.
+_PLAN_INTENT_RE = re.compile(
+    r"^\s*(?:can you\s+|please\s+)?(?:show|display|pull up)(?:\s+me)?"
+    r"(?:\s+(?:my|the|this week'?s|this))?(?:\s+current)?(?:\s+training)?\s+(?:plan|week)\s*[.!?]*\s*$",
+    re.IGNORECASE
+)
+
+
+def _plan_card_reply(plan: Dict[str, Any]) -> str:
+    """Render a plan returned by _read_training_plan as a [TRAINING_PLAN_CARD] reply"""
+    card = _dump({
+        'goal': plan['goal'],
+        'week_start': plan['week_start'],
+        'workouts': plan['workouts']
+    })
+    return f"Here's your week:\n\n[TRAINING_PLAN_CARD]\n{card}\n[/TRAINING_PLAN_CARD]"
+
+
+class InvokePayload(msgspec.Struct):
+    """Request body sent by the chat Lambda.
+
+    With streaming_input set, clients may send partial_prompt updates while the user is
+    still typing; each one warms the session and returns without a model turn. The turn
+    itself runs when the final prompt arrives.
+    """
+    strava_user_id: Annotated[str, msgspec.Meta(min_length=1)]
+    prompt: str = ''
+    streaming_input: bool = False
+    partial_prompt: Optional[str] = None
 
 
 @app.entrypoint
 async def invoke(payload):
     """AgentCore entrypoint for handling user requests.
 
-    Creates a new Agent instance per request with S3SessionManager.
-    Messages are automatically persisted to S3 via built-in Strands hooks.
+    Reuses the session's pooled Agent when warm, otherwise creates one from AgentCore
+    Memory history. Turns on the same session run one at a time.
     """
-    # Extract user context and prompt
-    strava_user_id = payload.get('strava_user_id')
-    user_message = payload.get('prompt', '')
-
-    if not strava_user_id:
-        raise ValueError('Missing strava_user_id in payload')
+    # Validate user context and prompt; msgspec.ValidationError (a ValueError) names the bad field
+    request = msgspec.convert(payload, InvokePayload)
+    strava_user_id = request.strava_user_id
+    user_message = request.prompt
 
     # Get session ID from BedrockAgentCoreContext (set by the runtime from the request header)
     session_id = BedrockAgentCoreContext.get_session_id()
@@ -1034,79 +1769,67 @@ async def invoke(payload):
 
     # Create memory session for manual persistence
     memory_id = os.getenv('BEDROCK_AGENTCORE_MEMORY_ID')
-    session_manager = MemorySessionManager(memory_id=memory_id, region_name='us-east-1')
+    session_manager = _session_manager(memory_id)
     memory_session = session_manager.create_memory_session(
         actor_id=session_id,
         session_id=session_id
     )
 
-    # Retrieve conversation history from AgentCore Memory
-    conversation_history = []
-    try:
-        recent_turns = memory_session.get_last_k_turns(k=20)  # Get last 20 turns (10 exchanges)
-        for turn in recent_turns:
-            for message in turn:
-                role = message.get('role', '')
-                content = message.get('content', {})
-                if isinstance(content, dict):
-                    text = content.get('text', '')
-                elif isinstance(content, str):
-                    text = content
-                else:
-                    text = str(content)
-
-                if text:
-                    # Format for Strands Agent: {"role": "user/assistant", "content": [{"text": "..."}]}
-                    conversation_history.append({
-                        "role": role.lower(),
-                        "content": [{"text": text}]
-                    })
-        print(f"📚 Loaded {len(conversation_history)} messages from conversation history")
-    except Exception as e:
-        print(f"⚠️ Failed to load conversation history: {e}")
-
-    # Create agent instance with conversation history
-    agent = create_agent_with_session(
-        session_id=session_id,
-        strava_user_id=strava_user_id,
-        conversation_history=conversation_history
-    )
-
-    # Add user context to message
-    context_message = f"[User Context: strava_user_id={strava_user_id}]\n\n{user_message}"
-
-    # Save user message to memory immediately
-    memory_session.add_turns(messages=[ConversationalMessage(user_message, MessageRole.USER)])
-
-    # Use streaming for real-time UX (cache bust: v20 - yield events directly per docs)
-    response_chunks = []
-    async for event in agent.stream_async(context_message):
-        # Yield event directly - AgentCore runtime handles all formatting
-        yield event
-
-        # Collect text chunks for memory persistence
-        if isinstance(event, str):
-            response_chunks.append(event)
-        elif isinstance(event, dict):
-            # Extract text from nested event structure for memory persistence
-            if 'event' in event:
-                chunk_event = event['event']
-                if 'contentBlockDelta' in chunk_event:
-                    delta = chunk_event['contentBlockDelta'].get('delta', {})
-                    text = delta.get('text', '')
-                    if text:
-                        response_chunks.append(text)
-        elif hasattr(event, 'text'):
-            response_chunks.append(event.text)
-        elif hasattr(event, 'content'):
-            response_chunks.append(event.content)
-
-    # Save assistant response to memory after streaming completes
-    full_response = ''.join(response_chunks)
-    if full_response:
-        memory_session.add_turns(messages=[ConversationalMessage(full_response, MessageRole.ASSISTANT)])
-        print(f"✅ Manually saved assistant response to memory ({len(full_response)} chars)")
-
+    # Partial input update: warm up for the coming turn, send no content
+    if request.streaming_input and request.partial_prompt is not None and not user_message:
+        await _prewarm_session(session_id, strava_user_id, memory_session, request.partial_prompt)
+        yield _DONE_EVENT
+        return
+
+    async with _session_lock(session_id):
+        # Deterministic intents skip the model: one storage read and a fixed template
+        if _PLAN_INTENT_RE.match(user_message):
+            plan = await asyncio.to_thread(_read_training_plan, strava_user_id)
+            if plan.get('found'):
+                reply = _plan_card_reply(plan)
+                _MEM_POOL.submit(_persist_turn, memory_session, user_message, MessageRole.USER)
+
+                yield {'type': 'content', 'text': reply}
+                yield _DONE_EVENT
+
+                # Keep a warm agent's context in step with what memory now holds
+                warm_agent = _AGENT_POOL.get(session_id)
+                if warm_agent is not None:
+                    warm_agent.messages.extend([
+                        {"role": "user", "content": [{"text": user_message}]},
+                        {"role": "assistant", "content": [{"text": reply}]}
+                    ])
+                _MEM_POOL.submit(_persist_turn, memory_session, reply, MessageRole.ASSISTANT)
+                print(f"✅ Answered plan request without a model turn ({len(reply)} chars)")
+                return
+
+        agent = await _session_agent(session_id, strava_user_id, memory_session)
+
+        # Queue the user message for memory; the write happens off the response path
+        _MEM_POOL.submit(_persist_turn, memory_session, user_message, MessageRole.USER)
+
+        # Stream model text as it arrives, coalesced into small chunks. The AgentCore
+        # runtime wraps each yielded dict in an SSE "data:" frame, so only the text
+        # payload is sent rather than every internal Strands event.
+        response_chunks = []
+        try:
+            async for text in _coalesced_text(agent.stream_async(user_message)):
+                yield {'type': 'content', 'text': text}
+
+                # Collect text chunks for memory persistence
+                response_chunks.append(text)
+        except BaseException:
+            # A turn cut off mid-stream can leave the agent's messages inconsistent
+            _AGENT_POOL.pop(session_id, None)
+            raise
+
+        # Finish the response first, then queue the assistant message for memory
+        yield _DONE_EVENT
+
+        full_response = ''.join(response_chunks)
+        if full_response:
+            _MEM_POOL.submit(_persist_turn, memory_session, full_response, MessageRole.ASSISTANT)
+            print(f"✅ Queued assistant response for memory ({len(full_response)} chars)")
 
 if __name__ == "__main__":
     app.run()